@@ -0,0 +1,26 @@
+"""Build the optional Cython import scanner when Cython is available.
+
+All project metadata lives in pyproject.toml. Without Cython, or without a
+working compiler, the package installs as pure Python and falls back to the
+regex scanner.
+"""
+
+from setuptools import Extension, setup
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    ext_modules = []
+else:
+    ext_modules = cythonize(
+        [
+            Extension(
+                "pytest_smart_runner._fast_imports",
+                ["src/pytest_smart_runner/_fast_imports.pyx"],
+                optional=True,
+            )
+        ],
+        language_level=3,
+    )
+
+setup(ext_modules=ext_modules)
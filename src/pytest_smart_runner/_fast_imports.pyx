@@ -0,0 +1,169 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Optional C import scanner; mirrors mapper._scan_file."""
+
+from libc.string cimport memchr, memcmp
+from posix.fcntl cimport open as c_open, O_RDONLY
+from posix.mman cimport mmap, munmap, PROT_READ, MAP_PRIVATE, MAP_FAILED
+from posix.stat cimport struct_stat, fstat
+from posix.unistd cimport close
+
+
+cdef inline bint _is_word(char c) nogil:
+    return (b'a' <= c <= b'z') or (b'A' <= c <= b'Z') or (b'0' <= c <= b'9') or c == b'_'
+
+
+cdef inline bint _is_blank(char c) nogil:
+    return c == b' ' or c == b'\t'
+
+
+cdef inline bint _starts_body(const char *p, const char *end) nogil:
+    """Check for a top-level def, async def, class or decorator."""
+    cdef Py_ssize_t n = end - p
+    if n >= 1 and p[0] == b'@':
+        return True
+    if n >= 4 and memcmp(p, b"def ", 4) == 0:
+        return True
+    if n >= 6 and memcmp(p, b"class ", 6) == 0:
+        return True
+    if n >= 10 and memcmp(p, b"async def ", 10) == 0:
+        return True
+    return False
+
+
+cdef void _add_root(set imports, const char *start, const char *stop):
+    """Add the first named component of a dotted module name."""
+    while start < stop and start[0] == b'.':
+        start += 1
+    cdef const char *p = start
+    while p < stop and p[0] != b'.':
+        p += 1
+    if p > start:
+        imports.add(start[:p - start].decode('ascii'))
+
+
+cdef void _scan_line(set imports, const char *p, const char *end):
+    """Scan a single line for `from x import` or `import x, y as z`."""
+    cdef const char *name
+    cdef const char *q
+
+    while p < end and _is_blank(p[0]):
+        p += 1
+
+    if end - p > 4 and memcmp(p, b"from", 4) == 0 and _is_blank(p[4]):
+        p += 4
+        while p < end and _is_blank(p[0]):
+            p += 1
+        name = p
+        while p < end and (_is_word(p[0]) or p[0] == b'.'):
+            p += 1
+        if p == name or p == end or not _is_blank(p[0]):
+            return
+        q = p
+        while q < end and _is_blank(q[0]):
+            q += 1
+        if end - q >= 6 and memcmp(q, b"import", 6) == 0 and (
+            end - q == 6 or not _is_word(q[6])
+        ):
+            _add_root(imports, name, p)
+        return
+
+    if end - p > 6 and memcmp(p, b"import", 6) == 0 and _is_blank(p[6]):
+        p += 6
+        while p < end and _is_blank(p[0]):
+            p += 1
+        # Each comma-separated part contributes its first token
+        while p < end:
+            while p < end and _is_blank(p[0]):
+                p += 1
+            name = p
+            while p < end and (_is_word(p[0]) or p[0] == b'.'):
+                p += 1
+            if p > name:
+                _add_root(imports, name, p)
+            while p < end and (_is_word(p[0]) or p[0] == b'.' or _is_blank(p[0])):
+                p += 1
+            if p < end and p[0] == b',':
+                p += 1
+            else:
+                return
+
+
+cdef inline bint _mentions_import_module(const char *p, const char *end) nogil:
+    """Check whether a line contains `import_module`."""
+    while end - p >= 13:
+        p = <const char *>memchr(p, b'i', end - p - 12)
+        if p == NULL:
+            return False
+        if memcmp(p, b"import_module", 13) == 0:
+            return True
+        p += 1
+    return False
+
+
+cdef inline char _open_quote(const char *p, const char *end, char quote) nogil:
+    """Return the triple-quote character still open at the end of a line, or 0."""
+    cdef char c
+    while end - p >= 3:
+        c = p[0]
+        if (c == b'"' or c == b"'") and p[1] == c and p[2] == c and (quote == 0 or quote == c):
+            quote = c if quote == 0 else 0
+            p += 3
+        else:
+            p += 1
+    return quote
+
+
+def scan_imports(bytes path):
+    """
+    Scan the import header of a file and return its imported module roots.
+
+    Args:
+        path: File system encoded path to the Python file
+
+    Returns:
+        Tuple of (list of imported module roots, whether the header mentions
+        ``import_module`` and needs the dynamic-import fallback)
+    """
+    cdef int fd = c_open(path, O_RDONLY)
+    if fd < 0:
+        raise OSError(f"Cannot open {path!r}")
+
+    cdef struct_stat st
+    cdef void *buf
+    cdef Py_ssize_t size
+    try:
+        if fstat(fd, &st) != 0:
+            raise OSError(f"Cannot stat {path!r}")
+        size = st.st_size
+        if size == 0:
+            return [], False
+        buf = mmap(NULL, size, PROT_READ, MAP_PRIVATE, fd, 0)
+        if buf == MAP_FAILED:
+            raise OSError(f"Cannot mmap {path!r}")
+    finally:
+        close(fd)
+
+    cdef set imports = set()
+    cdef bint dynamic = False
+    cdef const char *p = <const char *>buf
+    cdef const char *end = p + size
+    cdef const char *eol
+    cdef char quote = 0
+    if size >= 3 and memcmp(p, b"\xef\xbb\xbf", 3) == 0:
+        p += 3
+    try:
+        while p < end:
+            eol = <const char *>memchr(p, b'\n', end - p)
+            if eol == NULL:
+                eol = end
+            if quote == 0 and _starts_body(p, eol):
+                break
+            _scan_line(imports, p, eol)
+            quote = _open_quote(p, eol, quote)
+            if not dynamic:
+                dynamic = _mentions_import_module(p, eol)
+            p = eol + 1
+    finally:
+        munmap(buf, size)
+
+    return list(imports), dynamic
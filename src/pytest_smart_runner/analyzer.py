@@ -1,9 +1,31 @@
 """Git change analyzer to detect modified files."""
 
+import functools
 import os
+import subprocess
 from pathlib import Path
-from typing import Set, Optional
-import git
+from typing import TYPE_CHECKING, Callable, Dict, List, Set, Optional
+
+if TYPE_CHECKING:
+    import git
+    import pygit2
+
+from .cache import get_cache_dir, load_json, save_json
+
+
+# Placeholder for attributes resolved on first use
+_UNRESOLVED = object()
+
+# Maximum number of diff results kept in the on-disk cache
+_DIFF_CACHE_SIZE = 64
+
+
+@functools.lru_cache(maxsize=8)
+def _get_repo(path: str) -> "git.Repo":
+    """Open a repository, shared by every analyzer for the same path."""
+    import git
+
+    return git.Repo(path, search_parent_directories=True)
 
 
 class GitChangeAnalyzer:
@@ -16,12 +38,23 @@ class GitChangeAnalyzer:
         Args:
             repo_path: Path to the git repository. Defaults to current directory.
         """
+        # GitPython is imported lazily to keep CLI startup fast
+        import git
+
         self.repo_path = Path(repo_path or os.getcwd())
         try:
-            self.repo = git.Repo(self.repo_path, search_parent_directories=True)
-        except git.InvalidGitRepositoryError:
+            # Keyed on the absolute path, so '.' after a chdir opens the new directory
+            self.repo = _get_repo(os.path.abspath(self.repo_path))
+        except (git.InvalidGitRepositoryError, git.NoSuchPathError):
             raise ValueError(f"Not a git repository: {self.repo_path}")
 
+        # libgit2 computes commit-to-commit diffs in memory without forking git.
+        # Opened on first use, since working-tree diffs never need it.
+        self._pygit2_repo = _UNRESOLVED
+
+        self._diff_cache_path = get_cache_dir(Path(self.repo.working_tree_dir)) / 'diff_cache.json'
+        self._diff_cache: Optional[Dict[str, List[str]]] = None
+
     def get_changed_files(
         self,
         base: str = "HEAD",
@@ -41,42 +74,111 @@ class GitChangeAnalyzer:
         Returns:
             Set of Path objects representing changed files
         """
-        changed_files = set()
+        import git
+
+        changed_files: Set[Path] = set()
+        raw_paths: List[bytes] = []
 
-        # Get staged changes
+        # Get staged changes (index vs base). These only change when the base
+        # moves or the index file is rewritten, so they can be cached.
         if include_staged:
             try:
-                diff_staged = self.repo.index.diff(base)
-                for diff in diff_staged:
-                    if diff.a_path:
-                        changed_files.add(Path(diff.a_path))
-                    if diff.b_path:
-                        changed_files.add(Path(diff.b_path))
-            except git.exc.BadName:
-                # If HEAD doesn't exist (empty repo), get all staged files
-                diff_staged = self.repo.index.diff(None)
-                for diff in diff_staged:
-                    if diff.a_path:
-                        changed_files.add(Path(diff.a_path))
-
-        # Get unstaged changes
+                base_sha = self.repo.commit(base).hexsha
+            except (git.exc.BadName, ValueError):
+                base_sha = None
+
+            if base_sha is not None:
+                def staged() -> Set[Path]:
+                    return self._python_paths(
+                        self._git_name_list('diff', '--cached', base_sha, '--')
+                    )
+
+                try:
+                    index_stat = os.stat(os.path.join(self.repo.git_dir, 'index'))
+                except FileNotFoundError:
+                    # No index yet (e.g. after `git clone --no-checkout`), so
+                    # there is nothing to key the cache on
+                    changed_files |= staged()
+                else:
+                    key = f"staged:{base_sha}:{index_stat.st_mtime_ns}:{index_stat.st_size}"
+                    changed_files |= self._cached_diff(key, staged)
+            elif base != "HEAD":
+                raise ValueError(f"Invalid base: {base}")
+            else:
+                # HEAD only fails to resolve before the first commit, when
+                # everything in the index is staged
+                raw_paths += self._git_name_list('diff', '--cached')
+
+        # Get unstaged changes (working tree vs index)
         if include_unstaged:
-            diff_unstaged = self.repo.index.diff(None)
-            for diff in diff_unstaged:
-                if diff.a_path:
-                    changed_files.add(Path(diff.a_path))
-                if diff.b_path:
-                    changed_files.add(Path(diff.b_path))
-
-        # Get untracked files
+            raw_paths += self._git_name_list('diff')
+
+        # Get untracked files, letting git apply the .py filter so large
+        # untracked trees never reach Python
         if include_untracked:
-            for file_path in self.repo.untracked_files:
-                changed_files.add(Path(file_path))
+            raw_paths += self._git_name_list(
+                'ls-files', '--others', '--exclude-standard', '--', '*.py'
+            )
+
+        return changed_files | self._python_paths(raw_paths)
+
+    def _python_paths(self, raw_paths: List[bytes]) -> Set[Path]:
+        """Filter raw git output to Python files before decoding into Paths."""
+        return {Path(os.fsdecode(p)) for p in raw_paths if p.endswith(b'.py')}
+
+    def _cached_diff(self, key: str, compute: Callable[[], Set[Path]]) -> Set[Path]:
+        """
+        Return a diff result from the in-process or on-disk cache, computing it on a miss.
+
+        Args:
+            key: Cache key that fully determines the result (resolved SHAs, index stat)
+            compute: Function producing the changed files on a cache miss
+
+        Returns:
+            Set of Path objects representing changed files
+        """
+        if self._diff_cache is None:
+            cached = load_json(self._diff_cache_path)
+            self._diff_cache = cached if isinstance(cached, dict) else {}
+
+        paths = self._diff_cache.get(key)
+        if paths is not None:
+            return {Path(p) for p in paths}
+
+        changed_files = compute()
+        self._diff_cache[key] = sorted(str(p) for p in changed_files)
+
+        # Evict the oldest entries; dicts keep insertion order
+        while len(self._diff_cache) > _DIFF_CACHE_SIZE:
+            del self._diff_cache[next(iter(self._diff_cache))]
+
+        try:
+            save_json(self._diff_cache_path, self._diff_cache)
+        except OSError:
+            pass
+
+        return changed_files
 
-        # Filter to only Python files
-        python_files = {f for f in changed_files if f.suffix == '.py'}
+    def _git_name_list(self, *args: str) -> List[bytes]:
+        """
+        Run a git command that lists paths and return them as raw bytes.
+
+        ``diff`` commands are run with ``--name-only --no-renames`` so a rename
+        reports both the old and new path.
 
-        return python_files
+        Args:
+            *args: git subcommand and its arguments
+
+        Returns:
+            List of paths relative to the repository root
+        """
+        command = ['git', '-C', self.repo.working_tree_dir, args[0], '-z']
+        if args[0] == 'diff':
+            command += ['--name-only', '--no-renames']
+        command += args[1:]
+
+        result = subprocess.run(command, capture_output=True, check=True)
+        return [p for p in result.stdout.split(b'\x00') if p]
 
     def get_changed_files_since_commit(self, commit_sha: str) -> Set[Path]:
         """
@@ -88,22 +190,31 @@ class GitChangeAnalyzer:
         Returns:
             Set of Path objects representing changed files
         """
+        import git
+
         try:
             commit = self.repo.commit(commit_sha)
+        except git.exc.BadName:
+            raise ValueError(f"Invalid commit SHA: {commit_sha}")
+
+        def compute() -> Set[Path]:
+            if self._get_pygit2_repo() is not None:
+                return self._pygit2_changed_files(commit.hexsha, self.repo.head.commit.hexsha)
+
             diff = commit.diff('HEAD')
-            changed_files = set()
+            raw_paths = set()
 
             for diff_item in diff:
                 if diff_item.a_path:
-                    changed_files.add(Path(diff_item.a_path))
+                    raw_paths.add(diff_item.a_path)
                 if diff_item.b_path:
-                    changed_files.add(Path(diff_item.b_path))
+                    raw_paths.add(diff_item.b_path)
 
-            # Filter to only Python files
-            python_files = {f for f in changed_files if f.suffix == '.py'}
-            return python_files
-        except git.exc.BadName:
-            raise ValueError(f"Invalid commit SHA: {commit_sha}")
+            # Filter to only Python files before building Paths
+            return {Path(p) for p in raw_paths if p.endswith('.py')}
+
+        key = f"since:{commit.hexsha}:{self.repo.head.commit.hexsha}"
+        return self._cached_diff(key, compute)
 
     def get_changed_files_between_branches(self, base_branch: str, target_branch: str = "HEAD") -> Set[Path]:
         """
@@ -116,12 +227,62 @@ class GitChangeAnalyzer:
         Returns:
             Set of Path objects representing changed files
         """
-        try:
-            diff = self.repo.git.diff(f"{base_branch}...{target_branch}", name_only=True)
-            changed_files = {Path(f) for f in diff.split('\n') if f}
+        import git
 
-            # Filter to only Python files
-            python_files = {f for f in changed_files if f.suffix == '.py'}
-            return python_files
-        except git.exc.GitCommandError as e:
+        try:
+            base_sha = self.repo.commit(base_branch).hexsha
+            target_sha = self.repo.commit(target_branch).hexsha
+        except (git.exc.BadName, ValueError) as e:
             raise ValueError(f"Error comparing branches: {e}")
+
+        def compute() -> Set[Path]:
+            if self._get_pygit2_repo() is not None:
+                merge_base = self._pygit2_repo.merge_base(base_sha, target_sha)
+                if merge_base is None:
+                    raise ValueError(
+                        f"Error comparing branches: {base_branch} and {target_branch} "
+                        "have no merge base"
+                    )
+                return self._pygit2_changed_files(str(merge_base), target_sha)
+
+            try:
+                diff = self.repo.git.diff(f"{base_sha}...{target_sha}", name_only=True)
+            except git.exc.GitCommandError as e:
+                raise ValueError(f"Error comparing branches: {e}")
+            # Filter to only Python files before building Paths
+            return {Path(f) for f in diff.split('\n') if f.endswith('.py')}
+
+        return self._cached_diff(f"between:{base_sha}:{target_sha}", compute)
+
+    def _get_pygit2_repo(self) -> Optional["pygit2.Repository"]:
+        """Open the repository with pygit2, or return None if it is not installed."""
+        if self._pygit2_repo is _UNRESOLVED:
+            try:
+                import pygit2
+            except ImportError:  # pragma: no cover - optional speedup
+                self._pygit2_repo = None
+            else:
+                self._pygit2_repo = pygit2.Repository(self.repo.git_dir)
+        return self._pygit2_repo
+
+    def _pygit2_changed_files(self, old_sha: str, new_sha: str) -> Set[Path]:
+        """
+        Diff two commit trees in memory with pygit2.
+
+        Args:
+            old_sha: SHA of the old commit
+            new_sha: SHA of the new commit
+
+        Returns:
+            Set of Path objects representing changed Python files
+        """
+        old_tree = self._pygit2_repo[old_sha].tree
+        new_tree = self._pygit2_repo[new_sha].tree
+
+        changed_files = set()
+        for delta in old_tree.diff_to_tree(new_tree).deltas:
+            for path in (delta.old_file.path, delta.new_file.path):
+                if path.endswith('.py'):
+                    changed_files.add(Path(path))
+
+        return changed_files
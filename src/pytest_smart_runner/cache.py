@@ -0,0 +1,70 @@
+"""On-disk cache shared between pytest-smart-runner invocations."""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+CACHE_DIR_NAME = ".pytest_smart_runner_cache"
+
+
+def get_cache_dir(root: Path) -> Path:
+    """Return the cache directory for a project root."""
+    return root / CACHE_DIR_NAME
+
+
+def load_json(path: Path) -> Optional[Any]:
+    """
+    Load a JSON cache file.
+
+    Args:
+        path: Path to the cache file
+
+    Returns:
+        Decoded contents, or None if the file is missing or corrupt
+    """
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+
+    try:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+def save_json(path: Path, data: Any) -> None:
+    """
+    Atomically write a JSON cache file, creating the cache directory if needed.
+
+    Args:
+        path: Path to the cache file
+        data: JSON-serializable data to store
+    """
+    _ensure_cache_dir(path.parent)
+
+    if orjson is not None:
+        payload = orjson.dumps(data)
+    else:
+        payload = json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(payload)
+    os.replace(tmp_path, path)
+
+
+def _ensure_cache_dir(cache_dir: Path) -> None:
+    """Create the cache directory with a .gitignore so it never shows up in git status."""
+    if cache_dir.is_dir():
+        return
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    (cache_dir / '.gitignore').write_text("# Created by pytest-smart-runner automatically.\n*\n")
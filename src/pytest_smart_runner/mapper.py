@@ -1,24 +1,338 @@
 """Test mapper to determine which tests are affected by code changes."""
 
-import ast
+import atexit
+import functools
 import os
+import re
+import sys
+import weakref
+from collections import defaultdict
 from pathlib import Path
-from typing import Set, Dict, List, Optional
+from typing import FrozenSet, Iterator, Set, Dict, List, Optional, Tuple, Union
+
+from .cache import get_cache_dir, load_json, save_json
+
+try:
+    from ._fast_imports import scan_imports as _fast_scan_imports
+except ImportError:  # pragma: no cover - optional C extension
+    _fast_scan_imports = None
+
+
+# Matches `from x.y import ...` (group 1) and `import x.y, z as w` (group 2)
+_IMPORT_RE = re.compile(
+    rb'^[ \t]*(?:from[ \t]+([\w.]+)[ \t]+import\b|import[ \t]+([\w., \t]+))',
+    re.MULTILINE,
+)
+
+
+def _scan_imports(data: bytes) -> Set[str]:
+    """
+    Collect imported module roots from Python source with a regex scan.
+
+    This avoids building an AST; it may over-report (e.g. import-like lines in
+    docstrings), which only ever selects extra tests, never fewer.
+    """
+    imports = set()
+    for match in _IMPORT_RE.finditer(data):
+        from_module = match.group(1)
+        if from_module is not None:
+            names = [from_module]
+        else:
+            names = [part.split()[0] for part in match.group(2).split(b',') if part.strip()]
+
+        for name in names:
+            # Relative imports (`from .foo import x`) resolve to their first named part
+            root = name.lstrip(b'.').split(b'.')[0]
+            if root:
+                imports.add(root.decode('ascii'))
+
+    return imports
+
+
+# Top-level lines that start the body of a module; imports rarely follow them
+_BODY_PREFIXES = (b'def ', b'async def ', b'class ', b'@')
+
+_UTF8_BOM = b'\xef\xbb\xbf'
+
+
+def _scan_file(path: str) -> Set[str]:
+    """
+    Scan the import header of a file.
+
+    Reading stops at the first top-level function, class or decorator, so large
+    test modules are only read as far as their imports. Uses the compiled
+    scanner from ``_fast_imports`` when it has been built.
+    """
+    if _fast_scan_imports is not None:
+        roots, dynamic = _fast_scan_imports(os.fsencode(path))
+        imports = set(roots)
+        if dynamic:
+            imports |= _dynamic_imports(_read_header(path))
+        return imports
+    return _scan_file_py(path)
+
+
+def _scan_file_py(path: str) -> Set[str]:
+    """Pure-Python implementation of _scan_file."""
+    header = _read_header(path)
+    imports = _scan_imports(header)
+    if b'import_module' in header:
+        imports |= _dynamic_imports(header)
+    return imports
+
+
+def _read_header(path: str) -> bytes:
+    """Read a file up to its first top-level function, class or decorator."""
+    header = []
+    quote = None
+    with open(path, 'rb') as f:
+        # Source stays undecoded; only a leading BOM would hide the first line
+        line = f.readline()
+        if line.startswith(_UTF8_BOM):
+            line = line[len(_UTF8_BOM):]
+        while line:
+            # Lines inside a triple-quoted string, e.g. a module docstring
+            # with usage examples, never start the module body
+            if quote is None and line.startswith(_BODY_PREFIXES):
+                break
+            header.append(line)
+            quote = _open_quote(line, quote)
+            line = f.readline()
+    return b''.join(header)
+
+
+def _open_quote(line: bytes, quote: Optional[bytes]) -> Optional[bytes]:
+    """
+    Track triple-quoted strings across a line.
+
+    Args:
+        line: Raw source line
+        quote: Triple-quote delimiter open at the start of the line, if any
+
+    Returns:
+        Triple-quote delimiter still open at the end of the line, if any
+    """
+    pos = 0
+    while True:
+        if quote is None:
+            double = line.find(b'"""', pos)
+            single = line.find(b"'''", pos)
+            if double < 0 and single < 0:
+                return None
+            if single < 0 or 0 <= double < single:
+                quote, pos = b'"""', double + 3
+            else:
+                quote, pos = b"'''", single + 3
+        else:
+            close = line.find(quote, pos)
+            if close < 0:
+                return quote
+            quote, pos = None, close + 3
+
+
+def _dynamic_imports(source: bytes) -> Set[str]:
+    """
+    Collect module roots of ``import_module("x.y")`` calls with literal names.
+
+    The regex scanner cannot see these, so the rare source that mentions
+    ``import_module`` is parsed with ``ast`` as well.
+    """
+    import ast
+
+    try:
+        tree = compile(source, '<header>', 'exec', flags=ast.PyCF_ONLY_AST, dont_inherit=True)
+    except (SyntaxError, ValueError):
+        return set()
+
+    imports = set()
+    for node in ast.walk(tree):
+        if type(node) is not ast.Call or not node.args:
+            continue
+
+        func = node.func
+        if type(func) is ast.Attribute:
+            func_name = func.attr
+        elif type(func) is ast.Name:
+            func_name = func.id
+        else:
+            continue
+
+        module = node.args[0]
+        if (
+            func_name == 'import_module'
+            and type(module) is ast.Constant
+            and isinstance(module.value, str)
+            and not module.value.startswith('.')
+        ):
+            imports.add(module.value.split('.')[0])
+
+    return imports
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_cached(path: str, mtime_ns: int, size: int) -> Tuple[str, ...]:
+    """
+    Scan a file once per (path, mtime_ns, size) within this process.
+
+    The stat fields are only part of the cache key, so an edited file misses.
+    Names are interned, so the many files importing the same package share
+    one string.
+    """
+    return tuple(sorted(map(sys.intern, _scan_file(path))))
+
+
+# Directories that never contain project tests, skipped by name without a stat
+_SKIP_DIRS = frozenset({'__pycache__', '.git', '.venv', 'node_modules'})
+
+
+def _is_test_name(name: str) -> bool:
+    """Check if a file name follows the test_*.py or *_test.py convention."""
+    return name.endswith('.py') and (name.startswith('test_') or name.endswith('_test.py'))
+
+
+def _walk_tests(root: str) -> Iterator[str]:
+    """
+    Yield paths of test files under root in a single scandir pass.
+
+    Args:
+        root: Directory to search
+
+    Returns:
+        Iterator over test file paths
+    """
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            # Unreadable directories are skipped, as Path.rglob did
+            continue
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if name not in _SKIP_DIRS:
+                        stack.append(entry.path)
+                elif _is_test_name(name):
+                    yield entry.path
+
+
+@functools.lru_cache(maxsize=4096)
+def _module_path(project_root: str, changed_file: str) -> Optional[str]:
+    """Cached, pure implementation of TestMapper.get_module_path; paths must be absolute."""
+    # Relative path from project root by string prefix, without building Paths
+    root_prefix = project_root.rstrip(os.sep) + os.sep
+    if not changed_file.startswith(root_prefix):
+        return None
+    parts = changed_file[len(root_prefix):].split(os.sep)
+
+    # Remove 'src/' prefix if present
+    if parts[0] == 'src':
+        parts = parts[1:]
+
+    # Remove .py extension and convert to module path
+    if not parts or not parts[-1]:
+        return None
+    if parts[-1].endswith('.py'):
+        parts[-1] = parts[-1][:-len('.py')]
+    return '.'.join(parts)
+
+
+# Top-level standard library modules, which never map to project sources.
+# sys.stdlib_module_names is only available on Python 3.10+; older versions
+# keep every import.
+_STDLIB_MODULES: FrozenSet[str] = frozenset(
+    getattr(sys, 'stdlib_module_names', ())
+) | {'__future__'}
+
+
+# Mappers still alive at interpreter exit, flushed by a single exit hook. A
+# WeakSet never keeps a mapper alive and drops it once it is collected.
+_LIVE_MAPPERS: "weakref.WeakSet[TestMapper]" = weakref.WeakSet()
+
+
+def _save_at_exit() -> None:
+    """Flush the caches of every mapper still alive at interpreter exit."""
+    for mapper in list(_LIVE_MAPPERS):
+        mapper.save()
+
+
+atexit.register(_save_at_exit)
+
+
+# Below this many uncached files, starting a thread pool costs more than it saves
+_PARALLEL_SCAN_THRESHOLD = 16
+
+# Version of the on-disk import caches. Bump it whenever the scanning rules
+# change, so results from older scanners are discarded instead of reused.
+_CACHE_VERSION = 2
 
 
 class TestMapper:
     """Maps changed source files to their related test files."""
 
-    def __init__(self, project_root: Optional[str] = None):
+    __slots__ = (
+        '__weakref__',
+        '_abs_root',
+        '_import_cache',
+        '_import_cache_dirty',
+        '_import_cache_path',
+        '_import_cache_seen',
+        '_reverse_index',
+        '_reverse_index_dirty',
+        '_reverse_index_path',
+        '_reverse_index_signature',
+        '_stdlib_modules',
+        'import_map',
+        'project_root',
+        'run_all_ratio',
+    )
+
+    def __init__(
+        self,
+        project_root: Optional[str] = None,
+        run_all_ratio: Optional[float] = None
+    ):
         """
         Initialize the test mapper.
 
         Args:
             project_root: Root directory of the project. Defaults to current directory.
+            run_all_ratio: Select every test file once the number of changed files
+                exceeds this fraction of the test files. Disabled by default.
         """
         self.project_root = Path(project_root or os.getcwd())
+        self._abs_root = os.path.abspath(self.project_root)
+        self.run_all_ratio = run_all_ratio
         self.import_map: Dict[Path, Set[Path]] = {}
 
+        # Persistent cache of top-level import roots, keyed by file path and
+        # validated against (mtime_ns, size) so unchanged files are never re-parsed
+        self._import_cache_path = get_cache_dir(self.project_root) / 'imports.json'
+        cached = load_json(self._import_cache_path)
+        self._import_cache: Dict[str, Tuple[int, int, List[str]]] = (
+            cached['files']
+            if isinstance(cached, dict) and cached.get('version') == _CACHE_VERSION
+            else {}
+        )
+        self._import_cache_dirty = False
+        # Files looked up during this run; only these are written back, so
+        # entries for deleted or renamed files are dropped
+        self._import_cache_seen: Set[str] = set()
+
+        # Standard library names to filter out of imports, resolved on first use
+        self._stdlib_modules: Optional[FrozenSet[str]] = None
+
+        # Inverted import index (module root -> test files), reused while the
+        # mtime/size signature of the test files is unchanged
+        self._reverse_index_path = get_cache_dir(self.project_root) / 'reverse_index.json'
+        self._reverse_index: Optional[Dict[str, Set[Path]]] = None
+        self._reverse_index_signature: Optional[Dict[str, List[int]]] = None
+        self._reverse_index_dirty = False
+
+        # Persist anything scanned outside find_affected_tests
+        _LIVE_MAPPERS.add(self)
+
     def find_test_files(self, test_dirs: Optional[List[str]] = None) -> Set[Path]:
         """
         Find all test files in the project.
@@ -35,38 +349,148 @@ class TestMapper:
         test_files = set()
         for test_dir in test_dirs:
             test_path = self.project_root / test_dir
-            if test_path.exists():
-                for test_file in test_path.rglob('test_*.py'):
-                    test_files.add(test_file)
-                for test_file in test_path.rglob('*_test.py'):
-                    test_files.add(test_file)
+            if test_path.is_dir():
+                test_files.update(Path(p) for p in _walk_tests(str(test_path)))
 
         return test_files
 
-    def extract_imports(self, file_path: Path) -> Set[str]:
+    def extract_imports(
+        self,
+        file_path: Path,
+        strict: bool = False,
+        exclude_stdlib: bool = True
+    ) -> Set[str]:
         """
         Extract import statements from a Python file.
 
         Args:
             file_path: Path to the Python file
+            strict: Parse the file with ``ast`` instead of the fast regex scanner.
+                Strict results bypass the import cache.
+            exclude_stdlib: Leave out standard library modules (Python 3.10+), except
+                those shadowed by a top-level project module
 
         Returns:
             Set of module names imported in the file
         """
+        if strict:
+            imports = self._parse_imports(file_path)
+        else:
+            imports = self._scan_imports_cached(file_path)
+
+        if exclude_stdlib:
+            imports -= self._get_stdlib_modules()
+        return imports
+
+    def _get_stdlib_modules(self) -> FrozenSet[str]:
+        """Return standard library names that no top-level project module shadows."""
+        if self._stdlib_modules is None:
+            # A project package named e.g. `email` or `types` must stay
+            # visible, or tests importing it would never be selected
+            local = set()
+            for directory in (self.project_root, self.project_root / 'src'):
+                try:
+                    names = os.listdir(directory)
+                except OSError:
+                    continue
+                local.update(os.path.splitext(name)[0] for name in names)
+            self._stdlib_modules = _STDLIB_MODULES - local
+        return self._stdlib_modules
+
+    def _scan_imports_cached(self, file_path: Path) -> Set[str]:
+        """Scan a file's imports through the persistent and in-process caches."""
+        stat = os.stat(file_path)
+        key = str(file_path)
+        self._import_cache_seen.add(key)
+
+        cached = self._import_cache.get(key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return set(map(sys.intern, cached[2]))
+
+        imports = _parse_cached(key, stat.st_mtime_ns, stat.st_size)
+        self._import_cache[key] = (stat.st_mtime_ns, stat.st_size, list(imports))
+        self._import_cache_dirty = True
+
+        return set(imports)
+
+    def save(self) -> None:
+        """Write the import cache and reverse index back to disk if they have changed."""
+        if not (self._import_cache_dirty or self._reverse_index_dirty):
+            return
+        if not self.project_root.is_dir():
+            # Never recreate a project root that has since been removed
+            return
+
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                tree = ast.parse(f.read(), filename=str(file_path))
-        except (SyntaxError, UnicodeDecodeError):
+            if self._import_cache_dirty:
+                seen = self._import_cache_seen
+                save_json(self._import_cache_path, {
+                    'version': _CACHE_VERSION,
+                    'files': {k: v for k, v in self._import_cache.items() if k in seen},
+                })
+                self._import_cache_dirty = False
+
+            if self._reverse_index_dirty:
+                save_json(self._reverse_index_path, {
+                    'version': _CACHE_VERSION,
+                    'files': self._reverse_index_signature,
+                    'index': {
+                        root: sorted(str(t) for t in tests)
+                        for root, tests in self._reverse_index.items()
+                    },
+                })
+                self._reverse_index_dirty = False
+        except OSError:
+            # A read-only checkout shouldn't break test selection
+            return
+
+    def _parse_imports(self, file_path: Path) -> Set[str]:
+        """Parse a Python file and collect the root of every module-level import."""
+        import ast
+
+        try:
+            with open(file_path, 'rb') as f:
+                # Compile straight to an AST from bytes, without inherited
+                # compiler flags
+                tree = compile(
+                    f.read(), str(file_path), 'exec',
+                    flags=ast.PyCF_ONLY_AST, dont_inherit=True,
+                )
+        except (SyntaxError, ValueError):
             return set()
 
+        # AST node classes are never subclassed, so compare types by identity
+        # instead of isinstance() and bind them to locals for fast lookup
+        If, Import, ImportFrom = ast.If, ast.Import, ast.ImportFrom
+        # try/except* (ast.TryStar) only exists on Python 3.11+
+        try_types = (ast.Try, getattr(ast, 'TryStar', ast.Try))
+
+        # Also look one level into module-level if/try blocks, which hold
+        # conditional imports such as `if TYPE_CHECKING:` or optional deps
+        statements = []
+        for node in tree.body:
+            node_type = type(node)
+            if node_type is If:
+                statements.extend(node.body)
+                statements.extend(node.orelse)
+            elif node_type in try_types:
+                statements.extend(node.body)
+                for handler in node.handlers:
+                    statements.extend(handler.body)
+                statements.extend(node.orelse)
+                statements.extend(node.finalbody)
+            else:
+                statements.append(node)
+
         imports = set()
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
+        for node in statements:
+            node_type = type(node)
+            if node_type is Import:
                 for alias in node.names:
-                    imports.add(alias.name.split('.')[0])
-            elif isinstance(node, ast.ImportFrom):
+                    imports.add(sys.intern(alias.name.split('.')[0]))
+            elif node_type is ImportFrom:
                 if node.module:
-                    imports.add(node.module.split('.')[0])
+                    imports.add(sys.intern(node.module.split('.')[0]))
 
         return imports
 
@@ -80,23 +504,9 @@ class TestMapper:
         Returns:
             Module path as a string (e.g., 'mypackage.module')
         """
-        try:
-            # Get relative path from project root
-            rel_path = changed_file.relative_to(self.project_root)
-
-            # Remove 'src/' prefix if present
-            parts = list(rel_path.parts)
-            if parts and parts[0] == 'src':
-                parts = parts[1:]
-
-            # Remove .py extension and convert to module path
-            if parts:
-                parts[-1] = parts[-1].replace('.py', '')
-                return '.'.join(parts)
-        except ValueError:
-            return None
-
-        return None
+        # Relative roots and git's repo-relative paths are resolved once here,
+        # so the prefix check in _module_path compares like with like
+        return _module_path(self._abs_root, os.path.abspath(changed_file))
 
     def find_affected_tests(
         self,
@@ -113,88 +523,157 @@ class TestMapper:
         Returns:
             Set of test files that should be run
         """
+        if not changed_files:
+            return set()
+
         if test_files is None:
             test_files = self.find_test_files()
 
-        affected_tests = set()
+        # Strategy 1: Direct test file changes. Changed tests are selected
+        # as-is and never go through naming or import analysis
+        affected_tests = {f for f in changed_files if self._is_test_file(f)}
 
-        # Strategy 1: Direct test file changes
-        for changed_file in changed_files:
-            if self._is_test_file(changed_file):
-                affected_tests.add(changed_file)
+        # So much changed that selection would save little; run everything
+        ratio = self.run_all_ratio
+        if ratio is not None and len(changed_files) > ratio * len(test_files):
+            return set(test_files) | affected_tests
+        sources = changed_files - affected_tests
+        if not sources:
+            return affected_tests
 
         # Strategy 2: Naming convention mapping (test_foo.py tests foo.py)
-        for changed_file in changed_files:
-            if not self._is_test_file(changed_file):
-                # Try to find corresponding test file
-                test_candidates = self._get_test_candidates(changed_file)
-                for candidate in test_candidates:
-                    if candidate in test_files:
-                        affected_tests.add(candidate)
+        by_stem = self._index_tests(test_files)
+        for changed_file in sources:
+            affected_tests |= by_stem.get(changed_file.stem, set())
 
         # Strategy 3: Import analysis - find tests that import the changed modules
         changed_modules = set()
-        for changed_file in changed_files:
+        for changed_file in sources:
             module_path = self.get_module_path(changed_file)
             if module_path:
                 changed_modules.add(module_path)
 
-        for test_file in test_files:
-            imports = self.extract_imports(test_file)
-            # Check if any changed module is imported
-            for changed_module in changed_modules:
-                module_root = changed_module.split('.')[0]
-                if module_root in imports:
-                    affected_tests.add(test_file)
-                    break
+        # Nothing maps to a module (e.g. files outside the project root), so
+        # there is no need to index the imports of every test file
+        if not changed_modules:
+            return affected_tests
+
+        reverse_index = self._build_reverse_index(test_files)
+        for changed_module in changed_modules:
+            affected_tests |= reverse_index.get(changed_module.split('.')[0], set())
+
+        self.save()
 
         return affected_tests
 
-    def _is_test_file(self, file_path: Path) -> bool:
-        """Check if a file is a test file based on naming convention."""
-        name = file_path.name
-        return name.startswith('test_') or name.endswith('_test.py')
+    def _index_tests(self, test_files: Set[Path]) -> Dict[str, Set[Path]]:
+        """
+        Index test files by the source stem their name refers to.
+
+        Args:
+            test_files: Set of test files to index
 
-    def _get_test_candidates(self, source_file: Path) -> List[Path]:
+        Returns:
+            Mapping of source stem (``foo`` for ``test_foo.py``/``foo_test.py``)
+            to the test files named after it
         """
-        Get potential test files for a given source file.
+        by_stem: Dict[str, Set[Path]] = defaultdict(set)
+        for test_file in test_files:
+            name = test_file.name
+            if name.startswith('test_'):
+                by_stem[name[len('test_'):-len('.py')]].add(test_file)
+            if name.endswith('_test.py'):
+                by_stem[name[:-len('_test.py')]].add(test_file)
+        return by_stem
+
+    def _build_reverse_index(self, test_files: Set[Path]) -> Dict[str, Set[Path]]:
+        """
+        Build an index from imported module root to the test files importing it.
 
         Args:
-            source_file: Path to the source file
+            test_files: Set of test files to index
 
         Returns:
-            List of potential test file paths
+            Mapping of module root to the set of test files that import it
+        """
+        signature = {}
+        readable = []
+        for test_file in test_files:
+            try:
+                stat = os.stat(test_file)
+            except OSError:
+                # A test file that vanished or can't be read imports nothing
+                continue
+            signature[str(test_file)] = [stat.st_mtime_ns, stat.st_size]
+            readable.append(test_file)
+
+        if self._reverse_index is not None and signature == self._reverse_index_signature:
+            return self._reverse_index
+
+        reverse_index: Dict[str, Set[Path]] = defaultdict(set)
+        cached = load_json(self._reverse_index_path)
+        if (
+            isinstance(cached, dict)
+            and cached.get('version') == _CACHE_VERSION
+            and cached.get('files') == signature
+        ):
+            for root, tests in cached['index'].items():
+                reverse_index[root] = {Path(t) for t in tests}
+        else:
+            for test_file, imports in self._extract_imports_many(readable, signature):
+                for root in imports:
+                    reverse_index[root].add(test_file)
+            self._reverse_index_dirty = True
+
+        self._reverse_index = reverse_index
+        self._reverse_index_signature = signature
+        return reverse_index
+
+    def _extract_imports_many(
+        self,
+        test_files: List[Path],
+        signature: Dict[str, List[int]]
+    ) -> List[Tuple[Path, Set[str]]]:
         """
-        candidates = []
-        filename = source_file.stem  # filename without extension
+        Extract the imports of many files, using a thread pool when enough are uncached.
 
-        # Common test naming patterns
-        patterns = [
-            f"test_{filename}.py",
-            f"{filename}_test.py",
-        ]
+        Args:
+            test_files: Files to scan
+            signature: Mapping of file path to its current [mtime_ns, size]
 
-        # Check in tests directory
-        for test_dir in ['tests', 'test']:
-            test_path = self.project_root / test_dir
-            if test_path.exists():
-                for pattern in patterns:
-                    candidate = test_path / pattern
-                    candidates.append(candidate)
-
-                    # Also check in subdirectories matching source structure
-                    try:
-                        rel_path = source_file.relative_to(self.project_root)
-                        # Remove src prefix if present
-                        parts = list(rel_path.parts)
-                        if parts and parts[0] == 'src':
-                            parts = parts[1:]
-                        if len(parts) > 1:
-                            # Reconstruct path in test directory
-                            subdir = Path(*parts[:-1])
-                            candidate = test_path / subdir / pattern
-                            candidates.append(candidate)
-                    except ValueError:
-                        pass
-
-        return candidates
+        Returns:
+            List of (file, imported module roots) pairs
+        """
+        stale = 0
+        for key, (mtime_ns, size) in signature.items():
+            cached = self._import_cache.get(key)
+            if not (cached and cached[0] == mtime_ns and cached[1] == size):
+                stale += 1
+
+        if stale <= _PARALLEL_SCAN_THRESHOLD:
+            return [(f, self._extract_imports_or_empty(f)) for f in test_files]
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        # Scanning is dominated by file reads, which release the GIL
+        workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(zip(
+                test_files, executor.map(self._extract_imports_or_empty, test_files)
+            ))
+
+    def _extract_imports_or_empty(self, file_path: Path) -> Set[str]:
+        """Extract imports, treating a file that vanished or can't be read as importing nothing."""
+        try:
+            # The index is only queried with roots of changed project modules,
+            # so unfiltered roots keep it independent of which stdlib names the
+            # project shadows, and valid for its mtime/size signature
+            return self.extract_imports(file_path, exclude_stdlib=False)
+        except OSError:
+            return set()
+
+    @staticmethod
+    def _is_test_file(file_path: Union[Path, str]) -> bool:
+        """Check if a file is a test file based on naming convention."""
+        name = file_path.name if isinstance(file_path, Path) else os.path.basename(file_path)
+        return _is_test_name(name)
@@ -3,7 +3,6 @@
 import sys
 from pathlib import Path
 from typing import Set, Optional, List
-import pytest
 
 from .analyzer import GitChangeAnalyzer
 from .mapper import TestMapper
@@ -96,7 +95,7 @@ class SmartTestRunner:
 
         # Run pytest
         print("\nRunning tests...\n")
-        exit_code = pytest.main(test_paths + pytest_args)
+        exit_code = _run_pytest(test_paths + pytest_args)
 
         return exit_code
 
@@ -155,7 +154,7 @@ class SmartTestRunner:
             return 0
 
         print("\nRunning tests...\n")
-        exit_code = pytest.main(test_paths + pytest_args)
+        exit_code = _run_pytest(test_paths + pytest_args)
 
         return exit_code
 
@@ -216,6 +215,15 @@ class SmartTestRunner:
             return 0
 
         print("\nRunning tests...\n")
-        exit_code = pytest.main(test_paths + pytest_args)
+        exit_code = _run_pytest(test_paths + pytest_args)
 
         return exit_code
+
+
+def _run_pytest(args: List[str]) -> int:
+    """Run pytest with the given arguments and return its exit code."""
+    # pytest is imported only when tests actually run; its plugin
+    # discovery is wasted on dry runs and change-free invocations
+    import pytest
+
+    return pytest.main(args)
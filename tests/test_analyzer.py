@@ -1,7 +1,9 @@
 """Tests for the GitChangeAnalyzer class."""
 
+import os
 import tempfile
 from pathlib import Path
+from unittest import mock
 import pytest
 import git
 
@@ -23,12 +25,36 @@ class TestGitChangeAnalyzer:
 
         self.analyzer = GitChangeAnalyzer(str(self.repo_path))
 
+    def _commit_file(self, name, content):
+        """Write, stage and commit a single file."""
+        path = self.repo_path / name
+        path.write_text(content)
+        self.repo.index.add([str(path)])
+        return self.repo.index.commit(f"Add {name}")
+
     def test_init_invalid_repo(self):
         """Test initialization with invalid repository."""
         invalid_path = "/tmp/not_a_git_repo_xyz123"
         with pytest.raises(ValueError, match="Not a git repository"):
             GitChangeAnalyzer(invalid_path)
 
+    def test_init_reuses_repo(self):
+        """Test that analyzers for the same path share one Repo instance."""
+        assert GitChangeAnalyzer(str(self.repo_path)).repo is self.analyzer.repo
+
+    def test_init_relative_path_follows_cwd(self, monkeypatch):
+        """Test that a relative path is resolved against the current directory."""
+        other_path = Path(tempfile.mkdtemp())
+        other_repo = git.Repo.init(other_path)
+
+        monkeypatch.chdir(self.repo_path)
+        first = GitChangeAnalyzer(".")
+        monkeypatch.chdir(other_path)
+        second = GitChangeAnalyzer(".")
+
+        assert Path(first.repo.working_tree_dir).samefile(self.repo_path)
+        assert Path(second.repo.working_tree_dir).samefile(other_repo.working_tree_dir)
+
     def test_get_changed_files_untracked(self):
         """Test detection of untracked files."""
         # Create an untracked Python file
@@ -47,6 +73,16 @@ class TestGitChangeAnalyzer:
         changed = self.analyzer.get_changed_files(include_untracked=False)
         assert Path("new_module.py") not in changed
 
+    def test_get_changed_files_untracked_nested(self):
+        """Test detection of untracked Python files in subdirectories."""
+        package_dir = self.repo_path / "pkg" / "sub"
+        package_dir.mkdir(parents=True)
+        (package_dir / "module.py").write_text("# nested")
+        (package_dir / "notes.txt").write_text("not python")
+
+        changed = self.analyzer.get_changed_files(include_untracked=True)
+        assert changed == {Path("pkg/sub/module.py")}
+
     def test_get_changed_files_staged(self):
         """Test detection of staged changes."""
         # Create and stage a file
@@ -104,7 +140,87 @@ class TestGitChangeAnalyzer:
         assert Path("file2.py") in changed
         assert Path("file1.py") not in changed
 
+    def test_get_changed_files_since_commit_without_pygit2(self):
+        """Test the GitPython fallback used when pygit2 is not installed."""
+        commit1 = self._commit_file("file1.py", "# first")
+        self._commit_file("file2.py", "# second")
+
+        self.analyzer._pygit2_repo = None
+        changed = self.analyzer.get_changed_files_since_commit(commit1.hexsha)
+        assert changed == {Path("file2.py")}
+
     def test_get_changed_files_since_commit_invalid(self):
         """Test error handling for invalid commit SHA."""
         with pytest.raises(ValueError, match="Invalid commit SHA"):
             self.analyzer.get_changed_files_since_commit("invalid_sha_xyz")
+
+    def test_get_changed_files_staged_rename(self):
+        """Test that a staged rename reports both the old and new path."""
+        self._commit_file("old_name.py", "# module")
+
+        self.repo.index.move(["old_name.py", "new_name.py"])
+
+        changed = self.analyzer.get_changed_files(include_unstaged=False, include_untracked=False)
+        assert changed == {Path("old_name.py"), Path("new_name.py")}
+
+    def test_get_changed_files_invalid_base(self):
+        """Test error handling for an unknown base revision."""
+        self._commit_file("existing.py", "# original")
+
+        with pytest.raises(ValueError, match="Invalid base"):
+            self.analyzer.get_changed_files(base="no_such_branch")
+
+    def test_get_changed_files_staged_cached(self):
+        """Test that staged changes are served from the cache until the index changes."""
+        self._commit_file("existing.py", "# original")
+
+        staged_file = self.repo_path / "staged.py"
+        staged_file.write_text("# staged")
+        self.repo.index.add([str(staged_file)])
+
+        options = {"include_unstaged": False, "include_untracked": False}
+        assert self.analyzer.get_changed_files(**options) == {Path("staged.py")}
+
+        fresh_analyzer = GitChangeAnalyzer(str(self.repo_path))
+        with mock.patch.object(fresh_analyzer, "_git_name_list", side_effect=AssertionError):
+            assert fresh_analyzer.get_changed_files(**options) == {Path("staged.py")}
+
+        another_file = self.repo_path / "another.py"
+        another_file.write_text("# another")
+        self.repo.index.add([str(another_file)])
+
+        changed = GitChangeAnalyzer(str(self.repo_path)).get_changed_files(**options)
+        assert changed == {Path("staged.py"), Path("another.py")}
+
+    def test_get_changed_files_staged_without_index(self):
+        """Test staged changes in a repository that has commits but no index file."""
+        self._commit_file("existing.py", "# original")
+        os.remove(os.path.join(self.repo.git_dir, "index"))
+
+        options = {"include_unstaged": False, "include_untracked": False}
+        assert self.analyzer.get_changed_files(**options) == {Path("existing.py")}
+
+    def test_get_changed_files_between_branches(self):
+        """Test detection of changes on a branch since it diverged from base."""
+        self._commit_file("base.py", "# base")
+        base_branch = self.repo.active_branch.name
+        feature = self.repo.create_head("feature")
+
+        self._commit_file("on_base_only.py", "# base moved on")
+        feature.checkout()
+        self._commit_file("feature.py", "# feature")
+
+        for use_pygit2 in (True, False):
+            analyzer = GitChangeAnalyzer(str(self.repo_path))
+            if not use_pygit2:
+                analyzer._pygit2_repo = None
+            # Bypass the diff cache so each backend computes the result
+            analyzer._diff_cache = {}
+            changed = analyzer.get_changed_files_between_branches(base_branch, "feature")
+            assert changed == {Path("feature.py")}
+
+    def test_get_changed_files_between_branches_invalid(self):
+        """Test error handling for an unknown branch."""
+        self._commit_file("base.py", "# base")
+        with pytest.raises(ValueError, match="Error comparing branches"):
+            self.analyzer.get_changed_files_between_branches("no_such_branch")
@@ -1,50 +1,120 @@
 """Tests for the TestMapper class."""
 
-import tempfile
+import gc
+import os
+import sys
+import threading
+import weakref
 from pathlib import Path
+from unittest import mock
 import pytest
 
-from pytest_smart_runner.mapper import TestMapper
+from pytest_smart_runner import mapper as mapper_module
+from pytest_smart_runner.mapper import TestMapper, _module_path, _parse_cached
+
+
+@pytest.fixture
+def project_root(fs, monkeypatch):
+    """Empty project root directory on an in-memory filesystem."""
+    # The compiled scanner reads files with C I/O that pyfakefs can't see, and
+    # in-process caches would otherwise carry over between tests sharing paths
+    monkeypatch.setattr(mapper_module, "_fast_scan_imports", None)
+    _parse_cached.cache_clear()
+    _module_path.cache_clear()
+
+    root = Path("/project")
+    fs.create_dir(root)
+    return root
+
+
+@pytest.fixture
+def mapper(project_root):
+    """TestMapper for the per-test project root."""
+    return TestMapper(str(project_root))
+
+
+@pytest.fixture(scope="module")
+def shared_mapper(tmp_path_factory):
+    """TestMapper shared by tests that never touch the filesystem."""
+    return TestMapper(str(tmp_path_factory.mktemp("shared")))
 
 
 class TestTestMapper:
     """Test cases for TestMapper."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.project_root = Path(self.temp_dir)
-        self.mapper = TestMapper(str(self.project_root))
-
-    def test_is_test_file(self):
+    def test_is_test_file(self, shared_mapper):
         """Test identification of test files."""
-        assert self.mapper._is_test_file(Path("test_foo.py"))
-        assert self.mapper._is_test_file(Path("foo_test.py"))
-        assert not self.mapper._is_test_file(Path("foo.py"))
-        assert not self.mapper._is_test_file(Path("testing.py"))
+        assert shared_mapper._is_test_file(Path("test_foo.py"))
+        assert shared_mapper._is_test_file(Path("foo_test.py"))
+        assert not shared_mapper._is_test_file(Path("foo.py"))
+        assert not shared_mapper._is_test_file(Path("testing.py"))
+        assert not shared_mapper._is_test_file(Path("test_data.json"))
+
+        # Plain strings are accepted as well as Paths
+        assert shared_mapper._is_test_file("tests/unit/test_foo.py")
+        assert shared_mapper._is_test_file("foo_test.py")
+        assert not shared_mapper._is_test_file("tests/foo.py")
+        assert TestMapper._is_test_file("tests/test_foo.py")
 
-    def test_get_module_path(self):
+    def test_get_module_path(self, project_root, mapper):
         """Test conversion of file paths to module paths."""
         # Create a sample file structure
-        source_file = self.project_root / "src" / "mypackage" / "module.py"
+        source_file = project_root / "src" / "mypackage" / "module.py"
         source_file.parent.mkdir(parents=True, exist_ok=True)
         source_file.touch()
 
-        module_path = self.mapper.get_module_path(source_file)
+        module_path = mapper.get_module_path(source_file)
         assert module_path == "mypackage.module"
 
-    def test_get_module_path_without_src(self):
+    def test_get_module_path_without_src(self, project_root, mapper):
         """Test module path conversion without src directory."""
-        source_file = self.project_root / "mypackage" / "module.py"
+        source_file = project_root / "mypackage" / "module.py"
         source_file.parent.mkdir(parents=True, exist_ok=True)
         source_file.touch()
 
-        module_path = self.mapper.get_module_path(source_file)
+        module_path = mapper.get_module_path(source_file)
         assert module_path == "mypackage.module"
 
-    def test_extract_imports(self):
+    def test_get_module_path_relative_root(self, project_root, monkeypatch):
+        """Test module paths for a relative project root and relative changed files."""
+        monkeypatch.chdir(project_root)
+        relative_mapper = TestMapper(".")
+
+        assert relative_mapper.get_module_path(Path("src/pkg/foo.py")) == "pkg.foo"
+        assert relative_mapper.get_module_path(project_root / "pkg" / "bar.py") == "pkg.bar"
+
+        (project_root / "tests").mkdir()
+        (project_root / "tests" / "test_uses_pkg.py").write_text("from pkg import foo\n")
+        affected = relative_mapper.find_affected_tests({Path("src/pkg/foo.py")})
+        assert affected == {Path("tests/test_uses_pkg.py")}
+
+    def test_slots(self, shared_mapper):
+        """Test that mapper state lives in slots rather than a per-instance dict."""
+        assert not hasattr(shared_mapper, "__dict__")
+        with pytest.raises(AttributeError):
+            shared_mapper.unknown_attribute = True
+
+    def test_get_module_path_cached(self, project_root, mapper):
+        """Test that repeated lookups for the same file skip the path arithmetic."""
+        source_file = project_root / "src" / "mypackage" / "module.py"
+
+        _module_path.cache_clear()
+        assert mapper.get_module_path(source_file) == "mypackage.module"
+        assert mapper.get_module_path(source_file) == "mypackage.module"
+        assert TestMapper(str(project_root)).get_module_path(source_file) == "mypackage.module"
+
+        assert _module_path.cache_info().misses == 1
+        assert _module_path.cache_info().hits == 2
+
+    def test_get_module_path_edge_cases(self, project_root, mapper):
+        """Test module paths outside the project root and for dotted file names."""
+        assert mapper.get_module_path(Path("/elsewhere/mypackage/module.py")) is None
+        assert mapper.get_module_path(Path(f"{project_root}-other/module.py")) is None
+        assert mapper.get_module_path(project_root / "src" / "pkg.pyramid.py") == "pkg.pyramid"
+
+    def test_extract_imports(self, project_root, mapper):
         """Test extraction of imports from a Python file."""
-        test_file = self.project_root / "test.py"
+        test_file = project_root / "test.py"
         test_file.write_text("""
 import os
 import sys
@@ -53,83 +123,674 @@ from mypackage import module
 from mypackage.submodule import func
 """)
 
-        imports = self.mapper.extract_imports(test_file)
+        imports = mapper.extract_imports(test_file, exclude_stdlib=False)
         assert "os" in imports
         assert "sys" in imports
         assert "pathlib" in imports
         assert "mypackage" in imports
 
-    def test_find_test_files(self):
+    @pytest.mark.skipif(not hasattr(sys, "stdlib_module_names"), reason="requires Python 3.10+")
+    def test_extract_imports_excludes_stdlib(self, project_root, mapper):
+        """Test that standard library imports are left out by default."""
+        test_file = project_root / "test_stdlib.py"
+        test_file.write_text("""
+from __future__ import annotations
+import os.path
+import collections.abc
+from mypackage import module
+import requests
+""")
+
+        assert mapper.extract_imports(test_file) == {"mypackage", "requests"}
+        assert mapper.extract_imports(test_file, strict=True) == {"mypackage", "requests"}
+
+    def test_extract_imports_interned(self, project_root, mapper):
+        """Test that the same module name from different files is one string object."""
+        first = project_root / "test_first.py"
+        first.write_text("import mypackage\n")
+        second = project_root / "test_second.py"
+        second.write_text("from mypackage import module\n")
+
+        name_one, = mapper.extract_imports(first)
+        name_two, = TestMapper(str(project_root)).extract_imports(second)
+        name_strict, = mapper.extract_imports(second, strict=True)
+
+        assert name_one is name_two is name_strict
+
+    @pytest.mark.skipif(not hasattr(sys, "stdlib_module_names"), reason="requires Python 3.10+")
+    def test_find_affected_tests_project_shadows_stdlib(self, project_root, mapper):
+        """Test that a project package named like a stdlib module is still mapped."""
+        src_dir = project_root / "src" / "email"
+        src_dir.mkdir(parents=True)
+        source_file = src_dir / "parse.py"
+        source_file.write_text("def parse(): pass")
+        (project_root / "types.py").write_text("")
+        tests_dir = project_root / "tests"
+        tests_dir.mkdir()
+        test_file = tests_dir / "test_b.py"
+        test_file.write_text("import email.parse\nimport types\nimport os\n")
+
+        assert mapper.extract_imports(test_file) == {"email", "types"}
+        assert mapper.find_affected_tests({source_file}) == {test_file}
+
+    @pytest.mark.skipif(not hasattr(sys, "stdlib_module_names"), reason="requires Python 3.10+")
+    def test_find_affected_tests_stdlib_shadowed_after_warm_cache(self, project_root, mapper):
+        """Test that a newly added package shadowing a stdlib name is found with a warm cache."""
+        tests_dir = project_root / "tests"
+        tests_dir.mkdir()
+        test_file = tests_dir / "test_b.py"
+        test_file.write_text("import types\n")
+        other_file = project_root / "src" / "mypackage" / "foo.py"
+        assert mapper.find_affected_tests({other_file}) == set()
+
+        src_dir = project_root / "src" / "types"
+        src_dir.mkdir(parents=True)
+        source_file = src_dir / "__init__.py"
+        source_file.write_text("")
+
+        fresh_mapper = TestMapper(str(project_root))
+        with mock.patch("pytest_smart_runner.mapper._parse_cached", side_effect=AssertionError):
+            assert fresh_mapper.find_affected_tests({source_file}) == {test_file}
+
+    def test_extract_imports_dynamic(self, project_root, mapper):
+        """Test that literal importlib.import_module() calls are picked up."""
+        test_file = project_root / "test_dynamic.py"
+        test_file.write_text("""
+import importlib
+from importlib import import_module
+
+core = importlib.import_module("plugins.core")
+extra = import_module("extras")
+relative = import_module(".sibling", package="mypackage")
+""")
+
+        imports = mapper.extract_imports(test_file, exclude_stdlib=False)
+        assert imports == {"importlib", "plugins", "extras"}
+
+    def test_extract_imports_matches_strict_parse(self, project_root, mapper):
+        """Test that the regex scanner agrees with the AST parser."""
+        test_file = project_root / "test_scan.py"
+        test_file.write_text("""
+import os.path, json as js
+from . import sibling
+from .helpers import make_fixture
+from mypackage.submodule import (
+    func,
+)
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+""")
+
+        imports = mapper.extract_imports(test_file, exclude_stdlib=False)
+        assert imports == {"os", "json", "helpers", "mypackage", "yaml", "typing_extensions"}
+        assert imports == mapper.extract_imports(test_file, strict=True, exclude_stdlib=False)
+
+    def test_extract_imports_stops_at_module_body(self, project_root, mapper):
+        """Test that scanning stops at the first top-level function or class."""
+        test_file = project_root / "test_body.py"
+        test_file.write_text("""\"\"\"Module docstring.\"\"\"
+import sys
+
+sys.path.insert(0, "src")
+
+from mypackage import module
+
+pytestmark = []
+
+
+@decorator
+def test_something():
+    import lazy_dependency
+
+
+class TestGroup:
+    import other_lazy_dependency
+""")
+
+        assert mapper.extract_imports(test_file, exclude_stdlib=False) == {"sys", "mypackage"}
+
+    @pytest.mark.skipif(sys.version_info < (3, 11), reason="except* requires Python 3.11+")
+    def test_extract_imports_strict_try_star(self, project_root, mapper):
+        """Test that the AST parser descends into module-level try/except* blocks."""
+        test_file = project_root / "test_try_star.py"
+        test_file.write_text("""
+try:
+    import mypackage
+except* ImportError:
+    from otherpackage import fallback
+""")
+
+        expected = {"mypackage", "otherpackage"}
+        assert mapper.extract_imports(test_file, strict=True) == expected
+        assert mapper.extract_imports(test_file) == expected
+
+    def test_extract_imports_strict_ignores_nested_imports(self, project_root, mapper):
+        """Test that the AST parser only collects module-level imports."""
+        body = "\n".join(
+            f"    import fake_{i}\n    value_{i} = [x * {i} for x in range(10)]" for i in range(500)
+        )
+        test_file = project_root / "test_nested.py"
+        test_file.write_text(f"""
+import mypackage
+
+def test_something():
+{body}
+
+class TestGroup:
+    from other_fake import thing
+""")
+
+        imports = mapper.extract_imports(test_file, strict=True)
+        assert imports == {"mypackage"}
+
+    def test_extract_imports_undecoded_source(self, project_root, mapper):
+        """Test scanning files with a UTF-8 BOM or a non-UTF-8 coding cookie."""
+        bom_file = project_root / "test_bom.py"
+        bom_file.write_bytes(b"\xef\xbb\xbfimport mypackage\nfrom otherpackage import x\n")
+        latin1_file = project_root / "test_latin1.py"
+        latin1_file.write_bytes(
+            b"# -*- coding: latin-1 -*-\nimport mypackage\nNAME = 'caf\xe9'\nimport otherpackage\n"
+        )
+
+        for test_file in (bom_file, latin1_file):
+            assert mapper.extract_imports(test_file) == {"mypackage", "otherpackage"}
+            assert mapper.extract_imports(test_file, strict=True) == {"mypackage", "otherpackage"}
+
+    def test_extract_imports_skips_body_lines_in_docstrings(self, project_root, mapper):
+        """Test that def/class/decorator lines inside triple-quoted strings don't end the scan."""
+        test_file = project_root / "test_docstring.py"
+        test_file.write_text('''"""Usage:
+
+@see docs
+def example():
+class Foo:
+"""
+import mypackage
+NOTE = \'\'\'
+def still_a_string():
+\'\'\'
+from otherpackage import thing
+
+
+def test_something():
+    import lazy_dependency
+''')
+
+        expected = {"mypackage", "otherpackage"}
+        assert mapper.extract_imports(test_file) == expected
+        assert mapper.extract_imports(test_file, strict=True) == expected
+
+    def test_fast_scanner_matches_python_scanner(self, tmp_path):
+        """Test that the optional C scanner agrees with the pure-Python scanner."""
+        fast_imports = pytest.importorskip("pytest_smart_runner._fast_imports")
+        from pytest_smart_runner.mapper import _scan_file_py
+
+        # The C scanner reads through the OS, so this needs a real directory
+        test_file = tmp_path / "test_scan.py"
+        test_file.write_text("""
+import os.path, json as js
+from . import sibling
+from .helpers import make_fixture
+from mypackage.submodule import (
+    func,
+)
+importlib = None
+
+def test_something():
+    import lazy_dependency
+""")
+
+        roots, dynamic = fast_imports.scan_imports(bytes(test_file))
+        assert set(roots) == _scan_file_py(str(test_file)) == {"os", "json", "helpers", "mypackage"}
+        assert not dynamic
+
+        test_file.write_text('"""\n@see docs\ndef example():\n"""\nimport mypackage\ndef test_x(): pass\n')
+        roots, dynamic = fast_imports.scan_imports(bytes(test_file))
+        assert set(roots) == _scan_file_py(str(test_file)) == {"mypackage"}
+
+        test_file.write_bytes(b"\xef\xbb\xbfimport mypackage\ndef test_something(): pass\n")
+        roots, dynamic = fast_imports.scan_imports(bytes(test_file))
+        assert set(roots) == _scan_file_py(str(test_file)) == {"mypackage"}
+
+        test_file.write_text("import importlib\nplugin = importlib.import_module('plugins')\n")
+        roots, dynamic = fast_imports.scan_imports(bytes(test_file))
+        assert set(roots) == {"importlib"}
+        assert dynamic
+
+    def test_extract_imports_in_process_cache(self, project_root):
+        """Test that mappers in one process share scan results for unchanged files."""
+        test_file = project_root / "test_cached.py"
+        test_file.write_text("import mypackage\n")
+
+        _parse_cached.cache_clear()
+        TestMapper(str(project_root)).extract_imports(test_file)
+        TestMapper(str(project_root)).extract_imports(test_file)
+
+        assert _parse_cached.cache_info().hits == 1
+
+    def test_extract_imports_persistent_cache(self, project_root, mapper):
+        """Test that import roots are reused across mapper instances."""
+        test_file = project_root / "test_cached.py"
+        test_file.write_text("import mypackage\n")
+
+        assert mapper.extract_imports(test_file) == {"mypackage"}
+        mapper.save()
+
+        _parse_cached.cache_clear()
+        fresh_mapper = TestMapper(str(project_root))
+        with mock.patch("pytest_smart_runner.mapper._parse_cached", side_effect=AssertionError):
+            assert fresh_mapper.extract_imports(test_file) == {"mypackage"}
+
+    def test_extract_imports_saved_at_exit(self, project_root, monkeypatch):
+        """Test that scan results are written out by the exit hook."""
+        monkeypatch.setattr(mapper_module, "_LIVE_MAPPERS", weakref.WeakSet())
+        test_file = project_root / "test_cached.py"
+        test_file.write_text("import mypackage\n")
+
+        with mock.patch("atexit.register") as register:
+            mapper = TestMapper(str(project_root))
+        mapper.extract_imports(test_file)
+        register.assert_not_called()
+
+        mapper_module._save_at_exit()
+
+        fresh_mapper = TestMapper(str(project_root))
+        with mock.patch("pytest_smart_runner.mapper._parse_cached", side_effect=AssertionError):
+            assert fresh_mapper.extract_imports(test_file) == {"mypackage"}
+
+    def test_exit_hook_does_not_keep_mappers_alive(self, project_root, monkeypatch):
+        """Test that collected mappers drop out of the exit hook's set."""
+        live_mappers = weakref.WeakSet()
+        monkeypatch.setattr(mapper_module, "_LIVE_MAPPERS", live_mappers)
+
+        for _ in range(10):
+            TestMapper(str(project_root))
+        gc.collect()
+
+        assert len(live_mappers) == 0
+
+    def test_save_skips_removed_project_root(self, tmp_path):
+        """Test that saving never recreates a deleted project root."""
+        project_root = tmp_path / "gone"
+        project_root.mkdir()
+        test_file = project_root / "test_cached.py"
+        test_file.write_text("import mypackage\n")
+
+        mapper = TestMapper(str(project_root))
+        mapper.extract_imports(test_file)
+        test_file.unlink()
+        project_root.rmdir()
+
+        mapper.save()
+        assert not project_root.exists()
+
+    def test_extract_imports_cache_invalidated_on_change(self, project_root, mapper):
+        """Test that a modified file is parsed again."""
+        test_file = project_root / "test_cached.py"
+        test_file.write_text("import mypackage\n")
+        mapper.extract_imports(test_file)
+        mapper.save()
+
+        test_file.write_text("import otherpackage\n")
+        fresh_mapper = TestMapper(str(project_root))
+        assert fresh_mapper.extract_imports(test_file) == {"otherpackage"}
+
+    def test_extract_imports_cache_invalidated_on_version_change(self, project_root, mapper):
+        """Test that caches written by another scanner version are discarded."""
+        test_file = project_root / "test_cached.py"
+        test_file.write_text("import mypackage\n")
+        mapper.extract_imports(test_file)
+        mapper.save()
+
+        with mock.patch.object(mapper_module, "_CACHE_VERSION", mapper_module._CACHE_VERSION + 1):
+            fresh_mapper = TestMapper(str(project_root))
+        assert fresh_mapper._import_cache == {}
+
+    def test_import_cache_prunes_unseen_files(self, project_root, mapper):
+        """Test that files not looked up in a run are dropped from the saved cache."""
+        kept = project_root / "test_kept.py"
+        kept.write_text("import mypackage\n")
+        removed = project_root / "test_removed.py"
+        removed.write_text("import otherpackage\n")
+        mapper.extract_imports(kept)
+        mapper.extract_imports(removed)
+        mapper.save()
+
+        removed.unlink()
+        kept.write_text("import thirdpackage\n")
+        fresh_mapper = TestMapper(str(project_root))
+        fresh_mapper.extract_imports(kept)
+        fresh_mapper.save()
+
+        assert set(TestMapper(str(project_root))._import_cache) == {str(kept)}
+
+    def test_find_test_files(self, project_root, mapper):
         """Test discovery of test files."""
         # Create test directory structure
-        tests_dir = self.project_root / "tests"
+        tests_dir = project_root / "tests"
         tests_dir.mkdir()
 
         (tests_dir / "test_foo.py").touch()
         (tests_dir / "test_bar.py").touch()
         (tests_dir / "helper.py").touch()
 
-        test_files = self.mapper.find_test_files()
+        test_files = mapper.find_test_files()
         assert len(test_files) == 2
         assert any("test_foo.py" in str(f) for f in test_files)
         assert any("test_bar.py" in str(f) for f in test_files)
 
-    def test_get_test_candidates(self):
-        """Test generation of test file candidates for a source file."""
-        source_file = self.project_root / "src" / "mypackage" / "foo.py"
-        candidates = self.mapper._get_test_candidates(source_file)
+    def test_find_test_files_nested_and_skipped_dirs(self, project_root, mapper):
+        """Test that discovery recurses into subdirectories but skips tool directories."""
+        tests_dir = project_root / "tests"
+        (tests_dir / "unit" / "deep").mkdir(parents=True)
+        (tests_dir / "__pycache__").mkdir()
+        (tests_dir / "node_modules").mkdir()
+
+        nested = tests_dir / "unit" / "deep" / "test_nested.py"
+        nested.touch()
+        suffixed = tests_dir / "unit" / "api_test.py"
+        suffixed.touch()
+        (tests_dir / "__pycache__" / "test_cached.py").touch()
+        (tests_dir / "node_modules" / "test_vendor.py").touch()
+
+        assert mapper.find_test_files() == {nested, suffixed}
+
+    def test_find_test_files_skips_unreadable_dirs(self, project_root, mapper):
+        """Test that a directory that cannot be listed does not abort discovery."""
+        tests_dir = project_root / "tests"
+        (tests_dir / "locked").mkdir(parents=True)
+        (tests_dir / "locked" / "test_hidden.py").touch()
+        visible = tests_dir / "test_visible.py"
+        visible.touch()
+
+        real_scandir = os.scandir
 
-        # Should generate test_foo.py and foo_test.py in various locations
-        assert any("test_foo.py" in str(c) for c in candidates)
-        assert any("foo_test.py" in str(c) for c in candidates)
+        def scandir(path):
+            if Path(path).name == "locked":
+                raise PermissionError(path)
+            return real_scandir(path)
 
-    def test_find_affected_tests_direct_change(self):
+        with mock.patch("os.scandir", side_effect=scandir):
+            assert mapper.find_test_files() == {visible}
+
+    def test_find_affected_tests_direct_change(self, project_root, mapper):
         """Test finding affected tests when a test file itself changes."""
-        tests_dir = self.project_root / "tests"
+        tests_dir = project_root / "tests"
         tests_dir.mkdir()
         test_file = tests_dir / "test_foo.py"
         test_file.touch()
 
         changed_files = {test_file}
-        affected = self.mapper.find_affected_tests(changed_files)
+        affected = mapper.find_affected_tests(changed_files)
 
         assert test_file in affected
 
-    def test_find_affected_tests_naming_convention(self):
+    def test_find_affected_tests_only_test_files_changed(self, project_root, mapper):
+        """Test that import analysis is skipped when only test files changed."""
+        tests_dir = project_root / "tests"
+        tests_dir.mkdir()
+        test_file = tests_dir / "test_foo.py"
+        test_file.write_text("import mypackage")
+        other_test = tests_dir / "test_bar.py"
+        other_test.write_text("import mypackage")
+
+        with mock.patch.object(TestMapper, "extract_imports", side_effect=AssertionError):
+            affected = mapper.find_affected_tests({test_file})
+
+        assert affected == {test_file}
+
+    def test_find_affected_tests_no_changes(self, project_root, mapper):
+        """Test that nothing is selected, or even discovered, when nothing changed."""
+        with mock.patch.object(TestMapper, "find_test_files", side_effect=AssertionError):
+            assert mapper.find_affected_tests(set()) == set()
+
+    def test_find_affected_tests_run_all_ratio(self, project_root):
+        """Test that all tests are selected once too many files changed."""
+        tests_dir = project_root / "tests"
+        tests_dir.mkdir()
+        test_files = set()
+        for i in range(4):
+            test_file = tests_dir / f"test_mod_{i}.py"
+            test_file.write_text("import json")
+            test_files.add(test_file)
+        src_dir = project_root / "src" / "mypackage"
+        changed_files = {src_dir / "a.py", src_dir / "b.py", src_dir / "c.py"}
+
+        mapper = TestMapper(str(project_root), run_all_ratio=0.5)
+        with mock.patch.object(TestMapper, "_build_reverse_index", side_effect=AssertionError):
+            assert mapper.find_affected_tests(changed_files) == test_files
+
+        # Changed tests outside the discovered set are still selected
+        extra_test = project_root / "other" / "test_extra.py"
+        selected = mapper.find_affected_tests(changed_files | {extra_test}, test_files)
+        assert selected == test_files | {extra_test}
+
+        # At or below the ratio selection runs as usual
+        assert mapper.find_affected_tests(set(list(changed_files)[:2])) == set()
+        assert TestMapper(str(project_root)).find_affected_tests(changed_files) == set()
+
+    def test_find_affected_tests_mixed_changes(self, project_root, mapper):
+        """Test that changed test files are not mapped back to modules."""
+        tests_dir = project_root / "tests"
+        tests_dir.mkdir()
+        test_file = tests_dir / "test_bar.py"
+        test_file.write_text("import os")
+        source_file = project_root / "src" / "mypackage" / "foo.py"
+
+        with mock.patch.object(TestMapper, "get_module_path", wraps=mapper.get_module_path) as spy:
+            affected = mapper.find_affected_tests({test_file, source_file})
+
+        assert affected == {test_file}
+        spy.assert_called_once_with(source_file)
+
+    def test_find_affected_tests_no_changed_modules(self, project_root, mapper):
+        """Test that import analysis is skipped when no changed file maps to a module."""
+        tests_dir = project_root / "tests"
+        tests_dir.mkdir()
+        (tests_dir / "test_foo.py").write_text("import mypackage")
+
+        outside_file = Path("/outside/elsewhere.py")
+        with mock.patch.object(TestMapper, "extract_imports", side_effect=AssertionError):
+            affected = mapper.find_affected_tests({outside_file})
+
+        assert affected == set()
+
+    def test_find_affected_tests_naming_convention(self, project_root, mapper):
         """Test finding affected tests using naming conventions."""
         # Create source file
-        src_dir = self.project_root / "src" / "mypackage"
+        src_dir = project_root / "src" / "mypackage"
         src_dir.mkdir(parents=True)
         source_file = src_dir / "foo.py"
         source_file.touch()
 
         # Create corresponding test
-        tests_dir = self.project_root / "tests"
+        tests_dir = project_root / "tests"
         tests_dir.mkdir()
         test_file = tests_dir / "test_foo.py"
         test_file.touch()
 
         changed_files = {source_file}
         test_files = {test_file}
-        affected = self.mapper.find_affected_tests(changed_files, test_files)
+        affected = mapper.find_affected_tests(changed_files, test_files)
 
         assert test_file in affected
 
-    def test_find_affected_tests_by_imports(self):
+    def test_find_affected_tests_naming_convention_nested(self, project_root, mapper):
+        """Test naming-convention matches for test files in any test subdirectory."""
+        src_dir = project_root / "src" / "mypackage"
+        src_dir.mkdir(parents=True)
+        source_file = src_dir / "foo.py"
+        source_file.touch()
+
+        tests_dir = project_root / "tests" / "unit"
+        tests_dir.mkdir(parents=True)
+        prefixed = tests_dir / "test_foo.py"
+        suffixed = tests_dir / "foo_test.py"
+        unrelated = tests_dir / "test_foobar.py"
+        for test_file in (prefixed, suffixed, unrelated):
+            test_file.touch()
+
+        affected = mapper.find_affected_tests({source_file}, {prefixed, suffixed, unrelated})
+
+        assert affected == {prefixed, suffixed}
+
+    def test_find_affected_tests_naming_convention_many_changes(self, project_root, mapper):
+        """Test that many changed sources index and scan the suite only once."""
+        src_dir = project_root / "src" / "mypackage"
+        tests_dir = project_root / "tests"
+        tests_dir.mkdir()
+        # Stay at the parallel-scan threshold so every scan runs inline
+        for i in range(16):
+            (tests_dir / f"test_module_{i}.py").write_text("import json\n")
+        changed_files = {src_dir / f"module_{i}.py" for i in range(10)}
+        expected = {tests_dir / f"test_module_{i}.py" for i in range(10)}
+
+        with mock.patch.object(
+            TestMapper, "_index_tests", autospec=True, side_effect=TestMapper._index_tests
+        ) as index_spy, mock.patch(
+            "pytest_smart_runner.mapper._parse_cached", wraps=_parse_cached
+        ) as parse_spy:
+            assert mapper.find_affected_tests(changed_files) == expected
+
+        # One index for every changed source, and one scan per test file
+        assert index_spy.call_count == 1
+        assert parse_spy.call_count == 16
+
+    def test_find_affected_tests_by_imports(self, project_root, mapper):
         """Test finding affected tests by analyzing imports."""
         # Create source file
-        src_dir = self.project_root / "src" / "mypackage"
+        src_dir = project_root / "src" / "mypackage"
         src_dir.mkdir(parents=True)
         source_file = src_dir / "calculator.py"
         source_file.write_text("def add(a, b): return a + b")
 
         # Create test that imports the module
-        tests_dir = self.project_root / "tests"
+        tests_dir = project_root / "tests"
         tests_dir.mkdir()
         test_file = tests_dir / "test_math.py"
         test_file.write_text("from mypackage import calculator")
 
         changed_files = {source_file}
-        affected = self.mapper.find_affected_tests(changed_files)
+        affected = mapper.find_affected_tests(changed_files)
 
         assert test_file in affected
+
+    def test_reverse_index_reused_across_instances(self, project_root, mapper):
+        """Test that the reverse import index is loaded from disk when tests are unchanged."""
+        src_dir = project_root / "src" / "mypackage"
+        src_dir.mkdir(parents=True)
+        source_file = src_dir / "calculator.py"
+        source_file.write_text("def add(a, b): return a + b")
+
+        tests_dir = project_root / "tests"
+        tests_dir.mkdir()
+        test_file = tests_dir / "test_math.py"
+        test_file.write_text("from mypackage import calculator")
+
+        assert test_file in mapper.find_affected_tests({source_file})
+
+        fresh_mapper = TestMapper(str(project_root))
+        with mock.patch.object(TestMapper, "extract_imports", side_effect=AssertionError):
+            assert test_file in fresh_mapper.find_affected_tests({source_file})
+
+    def test_reverse_index_rebuilt_when_tests_change(self, project_root, mapper):
+        """Test that editing a test file invalidates the cached reverse index."""
+        src_dir = project_root / "src" / "mypackage"
+        src_dir.mkdir(parents=True)
+        source_file = src_dir / "calculator.py"
+        source_file.write_text("def add(a, b): return a + b")
+
+        tests_dir = project_root / "tests"
+        tests_dir.mkdir()
+        test_file = tests_dir / "test_math.py"
+        test_file.write_text("import json")
+
+        assert test_file not in mapper.find_affected_tests({source_file})
+
+        test_file.write_text("from mypackage import calculator")
+        fresh_mapper = TestMapper(str(project_root))
+        assert test_file in fresh_mapper.find_affected_tests({source_file})
+
+    def test_find_affected_tests_many_uncached_files(self, project_root, mapper):
+        """Test that scanning a large, uncached test suite in parallel finds every match."""
+        src_dir = project_root / "src" / "mypackage"
+        src_dir.mkdir(parents=True)
+        source_file = src_dir / "calculator.py"
+        source_file.write_text("def add(a, b): return a + b")
+
+        tests_dir = project_root / "tests"
+        tests_dir.mkdir()
+        importing, unrelated = set(), set()
+        for i in range(20):
+            importing_test = tests_dir / f"test_uses_{i}.py"
+            importing_test.write_text("from mypackage import calculator")
+            importing.add(importing_test)
+
+            unrelated_test = tests_dir / f"test_other_{i}.py"
+            unrelated_test.write_text("import json")
+            unrelated.add(unrelated_test)
+
+        affected = mapper.find_affected_tests({source_file})
+
+        assert importing <= affected
+        assert not unrelated & affected
+
+    def test_find_affected_tests_parallel(self, project_root, mapper):
+        """Test that uncached test files are scanned concurrently."""
+        tests_dir = project_root / "tests"
+        tests_dir.mkdir()
+        for i in range(20):
+            (tests_dir / f"test_slow_{i}.py").write_text("import mypackage")
+        source_file = project_root / "src" / "mypackage" / "foo.py"
+
+        # Each scan waits for a second one to be in flight, which can only
+        # happen when scans run concurrently
+        barrier = threading.Barrier(2, timeout=5)
+
+        def paired_extract(file_path, strict=False, exclude_stdlib=True):
+            barrier.wait()
+            return {"mypackage"}
+
+        with mock.patch.object(TestMapper, "extract_imports", side_effect=paired_extract):
+            affected = mapper.find_affected_tests({source_file})
+
+        assert len(affected) == 20
+
+    def test_find_affected_tests_missing_test_file(self, project_root, mapper):
+        """Test that a test file that no longer exists is skipped."""
+        tests_dir = project_root / "tests"
+        tests_dir.mkdir()
+        existing = tests_dir / "test_existing.py"
+        existing.write_text("import mypackage")
+        missing = tests_dir / "test_missing.py"
+        source_file = project_root / "src" / "mypackage" / "foo.py"
+
+        assert mapper.find_affected_tests({source_file}, {existing, missing}) == {existing}
+
+    def test_find_affected_tests_unreadable_test_file(self, project_root, mapper):
+        """Test that a test file failing to scan does not abort import analysis."""
+        tests_dir = project_root / "tests"
+        tests_dir.mkdir()
+        good_test = tests_dir / "test_good.py"
+        good_test.write_text("import mypackage")
+        bad_test = tests_dir / "test_bad.py"
+        bad_test.write_text("import mypackage")
+        source_file = project_root / "src" / "mypackage" / "foo.py"
+
+        real_extract = mapper.extract_imports
+
+        def flaky_extract(file_path, strict=False, exclude_stdlib=True):
+            if file_path == bad_test:
+                raise PermissionError(file_path)
+            return real_extract(file_path, strict, exclude_stdlib)
+
+        with mock.patch.object(TestMapper, "extract_imports", side_effect=flaky_extract):
+            affected = mapper.find_affected_tests({source_file})
+
+        assert affected == {good_test}